@@ -3,13 +3,17 @@
 #include <vector>
 #include <algorithm>
 #include <chrono>
+#include <cctype>
 #include <cmath>
+#include <cstdio>
+#include <filesystem>
 #include <fstream>
 #include <future>
 #include <random>
 #include <functional>
 #include <openssl/sha.h>
 #include <sched.h>
+#include <sys/stat.h>
 #include "../common/event_bus.h"
 #include "../common/concurrent_queue.h"
 #include "../common/memory_pool.h"
@@ -17,6 +21,33 @@
 
 namespace zero_latency {
 
+namespace {
+
+// 去掉模型路径的.onnx扩展名
+std::string stripOnnxExtension(const std::string& model_path) {
+    size_t ext_pos = model_path.rfind(".onnx");
+    if (ext_pos != std::string::npos && ext_pos == model_path.size() - 5) {
+        return model_path.substr(0, ext_pos);
+    }
+    return model_path;
+}
+
+// 获取CPU指令集标识，ENABLE_ALL级别的NCHWc布局块大小依赖AVX2/AVX-512
+std::string cpuIsaTag() {
+#if defined(__x86_64__) || defined(__i386__)
+    if (__builtin_cpu_supports("avx512f")) return "avx512";
+    if (__builtin_cpu_supports("avx2")) return "avx2";
+    if (__builtin_cpu_supports("avx")) return "avx";
+    return "sse";
+#elif defined(__aarch64__)
+    return "arm64";
+#else
+    return "generic";
+#endif
+}
+
+} // namespace
+
 // 构造函数
 OnnxInferenceEngine::OnnxInferenceEngine(const ServerConfig& config)
     : config_(config),
@@ -32,6 +63,8 @@ OnnxInferenceEngine::OnnxInferenceEngine(const ServerConfig& config)
       avg_inference_latency_ms_(0),
       p99_inference_latency_ms_(0),
       simulation_mode_(false),
+      use_compiled_provider_(false),
+      graph_optimization_level_(GraphOptimizationLevel::ORT_ENABLE_ALL),
       use_int8_quantization_(config.optimization.use_int8_quantization),
       use_zero_copy_(config.optimization.use_zero_copy),
       use_dynamic_batching_(config.optimization.use_dynamic_batching),
@@ -75,30 +108,14 @@ Result<void> OnnxInferenceEngine::initialize() {
         }
         
         // 配置会话选项
-        session_options_ = Ort::SessionOptions();
-        session_options_.SetIntraOpNumThreads(config_.worker_threads > 0 ? config_.worker_threads : 2);
-        session_options_.SetGraphOptimizationLevel(GraphOptimizationLevel::ORT_ENABLE_ALL);
-        session_options_.SetExecutionMode(ExecutionMode::ORT_SEQUENTIAL);
-        
-        // 如果启用了INT8量化，进行相关配置
-        if (use_int8_quantization_) {
-            auto quant_result = configureQuantization();
-            if (quant_result.hasError()) {
-                LOG_WARN("Failed to configure INT8 quantization: " + quant_result.error().message);
-                use_int8_quantization_ = false;
-            }
-        }
+        graph_optimization_level_ = GraphOptimizationLevel::ORT_ENABLE_ALL;
+        configureBaseSessionOptions();
         
-        // 如果可以使用GPU, 则添加CUDA执行提供者
-        #ifdef USE_CUDA
-        OrtCUDAProviderOptions cuda_options;
-        cuda_options.device_id = 0;
-        cuda_options.arena_extend_strategy = 0;
-        cuda_options.cudnn_conv_algo_search = OrtCudnnConvAlgoSearch::EXHAUSTIVE;
-        cuda_options.do_copy_in_default_stream = 1;
-        session_options_.AppendExecutionProvider_CUDA(cuda_options);
-        LOG_INFO("CUDA execution provider added");
-        #endif
+        // 按配置的优先级添加可用的执行提供者 (TensorRT > CUDA > CPU)
+        auto provider_result = configureExecutionProviders();
+        if (provider_result.hasError()) {
+            LOG_WARN("Failed to configure execution providers: " + provider_result.error().message);
+        }
         
         // 加载模型
         auto load_result = loadModel(config_.model_path);
@@ -294,6 +311,13 @@ std::unordered_map<std::string, std::string> OnnxInferenceEngine::getStatus() co
     status["zero_copy"] = use_zero_copy_ ? "enabled" : "disabled";
     status["dynamic_batching"] = use_dynamic_batching_ ? "enabled" : "disabled";
     
+    std::string providers;
+    for (const auto& provider : active_providers_) {
+        if (!providers.empty()) providers += ",";
+        providers += provider;
+    }
+    status["execution_providers"] = providers.empty() ? "CPUExecutionProvider" : providers;
+    
     if (inference_count_ > 0) {
         status["avg_inference_time_ms"] = std::to_string(avg_inference_latency_ms_.load());
         status["p99_inference_time_ms"] = std::to_string(p99_inference_latency_ms_.load());
@@ -475,6 +499,18 @@ void OnnxInferenceEngine::modelMonitorThreadFunc() {
     
     std::string last_hash = model_info_.hash;
     
+    // 记录文件元数据，未变化时无需重新计算整个文件的哈希
+    // 除mtime和大小外还比较inode和ctime: cp -p、rsync -a、解压等会保留mtime，
+    // 但替换文件必然产生新inode或更新ctime (ctime无法由用户态设置)
+    auto sameFileStat = [](const struct stat& a, const struct stat& b) {
+        return a.st_dev == b.st_dev && a.st_ino == b.st_ino && a.st_size == b.st_size &&
+               a.st_mtim.tv_sec == b.st_mtim.tv_sec && a.st_mtim.tv_nsec == b.st_mtim.tv_nsec &&
+               a.st_ctim.tv_sec == b.st_ctim.tv_sec && a.st_ctim.tv_nsec == b.st_ctim.tv_nsec;
+    };
+    
+    struct stat last_stat {};
+    bool has_last_stat = ::stat(config_.model_path.c_str(), &last_stat) == 0;
+    
     while (running_) {
         // 每10秒检查一次模型文件变化
         std::this_thread::sleep_for(std::chrono::seconds(10));
@@ -487,27 +523,31 @@ void OnnxInferenceEngine::modelMonitorThreadFunc() {
             continue;
         }
         
-        // 计算当前模型哈希
-        std::string current_hash = calculateModelHash(config_.model_path);
+        struct stat current_stat {};
+        bool has_current_stat = ::stat(config_.model_path.c_str(), &current_stat) == 0;
+        if (has_current_stat && has_last_stat && sameFileStat(current_stat, last_stat)) {
+            continue;
+        }
         
-        // 如果哈希值变化，重新加载模型
-        if (current_hash != last_hash) {
-            LOG_INFO("Model file changed, reloading...");
+        // 文件元数据变化，由loadModel计算哈希并判断是否需要重建会话
+        auto result = loadModel(config_.model_path, true);
+        if (result.isOk()) {
+            last_stat = current_stat;
+            has_last_stat = has_current_stat;
             
-            auto result = loadModel(config_.model_path, true);
-            if (result.isOk()) {
-                last_hash = current_hash;
+            if (model_info_.hash != last_hash) {
+                last_hash = model_info_.hash;
                 LOG_INFO("Model reloaded successfully");
                 
                 // 发布模型更新事件
                 Event event("MODEL_UPDATED");
                 event.setSource("OnnxInferenceEngine");
                 event.setData("model_path", config_.model_path);
-                event.setData("model_hash", current_hash);
+                event.setData("model_hash", last_hash);
                 publishEvent(event);
-            } else {
-                LOG_ERROR("Failed to reload model: " + result.error().message);
             }
+        } else {
+            LOG_ERROR("Failed to reload model: " + result.error().message);
         }
     }
     
@@ -530,8 +570,7 @@ Result<GameState> OnnxInferenceEngine::runInference(const InferenceRequest& requ
         auto preprocess_start = std::chrono::steady_clock::now();
         
         // 预处理图像数据
-        std::vector<float> input_tensor_values;
-        Result<std::vector<float>> preprocess_result;
+        Result<void> preprocess_result;
         
         // 获取线程本地缓冲区
         auto& buffer = input_buffer_pool_->getBuffer();
@@ -549,7 +588,8 @@ Result<GameState> OnnxInferenceEngine::runInference(const InferenceRequest& requ
             return Result<GameState>::error(preprocess_result.error());
         }
         
-        input_tensor_values = preprocess_result.value();
+        // 直接使用线程本地缓冲区作为输入，避免复制整帧张量
+        std::vector<float>& input_tensor_values = buffer.getBuffer();
         
         auto preprocess_end = std::chrono::steady_clock::now();
         auto preprocess_time = std::chrono::duration_cast<std::chrono::milliseconds>(
@@ -646,7 +686,7 @@ Result<GameState> OnnxInferenceEngine::runInference(const InferenceRequest& requ
 }
 
 // 图像预处理
-Result<std::vector<float>> OnnxInferenceEngine::preProcess(
+Result<void> OnnxInferenceEngine::preProcess(
     const std::vector<uint8_t>& image_data, 
     int width, 
     int height,
@@ -657,7 +697,7 @@ Result<std::vector<float>> OnnxInferenceEngine::preProcess(
     
     // 确保图像数据正确
     if (image_data.size() != width * height * 3) {
-        return Result<std::vector<float>>::error(
+        return Result<void>::error(
             ErrorCode::INVALID_INPUT, 
             "Invalid image data size: expected " + std::to_string(width * height * 3) + 
             ", got " + std::to_string(image_data.size())
@@ -696,11 +736,11 @@ Result<std::vector<float>> OnnxInferenceEngine::preProcess(
         }
     }
     
-    return Result<std::vector<float>>::ok(result);
+    return Result<void>::ok();
 }
 
 // 零拷贝预处理
-Result<std::vector<float>> OnnxInferenceEngine::preProcessZeroCopy(
+Result<void> OnnxInferenceEngine::preProcessZeroCopy(
     const uint8_t* image_data,
     size_t data_size, 
     int width, 
@@ -712,7 +752,7 @@ Result<std::vector<float>> OnnxInferenceEngine::preProcessZeroCopy(
     
     // 确保图像数据正确
     if (data_size != width * height * 3) {
-        return Result<std::vector<float>>::error(
+        return Result<void>::error(
             ErrorCode::INVALID_INPUT, 
             "Invalid image data size: expected " + std::to_string(width * height * 3) + 
             ", got " + std::to_string(data_size)
@@ -751,7 +791,7 @@ Result<std::vector<float>> OnnxInferenceEngine::preProcessZeroCopy(
         }
     }
     
-    return Result<std::vector<float>>::ok(result);
+    return Result<void>::ok();
 }
 
 // 模型输出后处理
@@ -964,18 +1004,43 @@ Result<void> OnnxInferenceEngine::loadModel(const std::string& model_path, bool
             return Result<void>::ok();
         }
         
+        // 计算模型哈希值
+        std::string model_hash = calculateModelHash(model_path);
+        
+        // 模型内容未变化时复用现有会话，避免重复加载和图优化
+        if (session_ && !model_hash.empty() && 
+            model_hash == model_info_.hash && model_path == model_info_.path) {
+            LOG_INFO("Model unchanged, reusing existing session");
+            return Result<void>::ok();
+        }
+        
         LOG_INFO("Loading YOLO model: " + model_path);
         
-        // 计算模型哈希值
-        model_info_.hash = calculateModelHash(model_path);
+        // 创建会话
+        try {
+            session_ = createSession(model_path, model_hash);
+        } catch (const Ort::Exception& e) {
+            bool uses_gpu = std::any_of(active_providers_.begin(), active_providers_.end(),
+                [](const std::string& provider) { return provider != "CPUExecutionProvider"; });
+            if (!uses_gpu) {
+                throw;
+            }
+            
+            // GPU执行提供者常在创建会话时才失败 (无设备、驱动不匹配、TensorRT构建失败)，回退到CPU
+            LOG_WARN("Failed to create session with GPU providers, falling back to CPU: " + std::string(e.what()));
+            configureBaseSessionOptions();
+            use_compiled_provider_ = false;
+            active_providers_ = {"CPUExecutionProvider"};
+            session_ = createSession(model_path, model_hash);
+        }
+        
+        // 会话创建成功后再更新模型信息，加载失败时下次检查会重试
+        model_info_.hash = model_hash;
         model_info_.path = model_path;
         model_info_.timestamp = std::chrono::duration_cast<std::chrono::milliseconds>(
             std::chrono::system_clock::now().time_since_epoch()
         ).count();
         
-        // 创建会话
-        session_ = std::make_unique<Ort::Session>(env_, model_path.c_str(), session_options_);
-        
         LOG_INFO("ONNX model loaded successfully");
         
         // 获取模型信息
@@ -995,9 +1060,11 @@ Result<void> OnnxInferenceEngine::loadModel(const std::string& model_path, bool
                 
                 // 设置模型输入尺寸信息
                 if (input_dims_[i].size() == 4) {
-                    // 通常NCHW格式
-                    model_info_.input_height = input_dims_[i][2];
-                    model_info_.input_width = input_dims_[i][3];
+                    // 通常NCHW格式，动态维度 (-1) 时使用配置的输入尺寸
+                    model_info_.input_height = input_dims_[i][2] > 0 ? 
+                        input_dims_[i][2] : config_.detection.model_height;
+                    model_info_.input_width = input_dims_[i][3] > 0 ? 
+                        input_dims_[i][3] : config_.detection.model_width;
                 }
                 
                 // 打印输入尺寸
@@ -1061,11 +1128,236 @@ Result<void> OnnxInferenceEngine::loadModel(const std::string& model_path, bool
     }
 }
 
+// 创建推理会话
+std::unique_ptr<Ort::Session> OnnxInferenceEngine::createSession(
+    const std::string& model_path, 
+    const std::string& model_hash) {
+    
+    std::string optimized_path = getOptimizedModelPath(model_path, model_hash);
+    
+    // 已有离线优化模型时直接加载，并关闭图优化以避免每次启动重复优化
+    if (!optimized_path.empty() && fileExists(optimized_path)) {
+        try {
+            Ort::SessionOptions cached_options = session_options_.Clone();
+            cached_options.SetGraphOptimizationLevel(GraphOptimizationLevel::ORT_DISABLE_ALL);
+            cached_options.AddConfigEntry("session.load_model_format", "ORT");
+            
+            auto session = std::make_unique<Ort::Session>(env_, optimized_path.c_str(), cached_options);
+            LOG_INFO("Loaded pre-optimized model: " + optimized_path);
+            return session;
+        } catch (const Ort::Exception& e) {
+            LOG_WARN("Failed to load pre-optimized model, rebuilding: " + std::string(e.what()));
+            std::remove(optimized_path.c_str());
+        }
+    }
+    
+    // 首次加载时执行完整图优化 (BN融合、常量折叠等)，并以ORT格式序列化到磁盘
+    // ORT格式无需重新解析protobuf，加载速度快于.onnx
+    if (!optimized_path.empty()) {
+        std::unique_ptr<Ort::Session> session;
+        try {
+            Ort::SessionOptions save_options = session_options_.Clone();
+            save_options.AddConfigEntry("session.save_model_format", "ORT");
+            save_options.SetOptimizedModelFilePath(optimized_path.c_str());
+            
+            session = std::make_unique<Ort::Session>(env_, model_path.c_str(), save_options);
+            LOG_INFO("Saved optimized model: " + optimized_path);
+        } catch (const Ort::Exception& e) {
+            // 目录只读、磁盘已满或无法序列化时，不使用缓存直接加载原模型
+            LOG_WARN("Failed to save optimized model, loading without cache: " + std::string(e.what()));
+            std::remove(optimized_path.c_str());
+        }
+        
+        if (session) {
+            removeStaleOptimizedModels(model_path, model_hash);
+            return session;
+        }
+    }
+    
+    return std::make_unique<Ort::Session>(env_, model_path.c_str(), session_options_);
+}
+
+// 获取离线优化模型的缓存路径
+std::string OnnxInferenceEngine::getOptimizedModelPath(
+    const std::string& model_path, 
+    const std::string& model_hash) {
+    
+    // 无法计算哈希时不使用缓存，防止加载过期的优化模型
+    // TensorRT等编译型执行提供者无法保存优化模型，由其引擎缓存代替
+    if (model_hash.empty() || use_compiled_provider_) {
+        return "";
+    }
+    
+    // 优化后的图与优化级别、执行提供者、ORT版本和CPU指令集相关 (如NCHWc布局、节点分配)，一并写入文件名
+    std::string providers;
+    for (const auto& provider : active_providers_) {
+        std::string name = provider.substr(0, provider.find("ExecutionProvider"));
+        std::transform(name.begin(), name.end(), name.begin(), ::tolower);
+        providers += (providers.empty() ? "" : "-") + name;
+    }
+    if (providers.empty()) {
+        providers = "cpu";
+    }
+    
+    // 以模型哈希作为文件名的一部分，模型更新后旧缓存自动失效
+    return stripOnnxExtension(model_path) + "." + model_hash.substr(0, 16) + 
+           ".O" + std::to_string(static_cast<int>(graph_optimization_level_)) + 
+           "." + providers + ".ort" + Ort::GetVersionString() + "." + cpuIsaTag() + ".opt.ort";
+}
+
+// 删除同一模型的过期优化缓存 (不抛出异常，清理失败不影响已创建的会话)
+void OnnxInferenceEngine::removeStaleOptimizedModels(
+    const std::string& model_path, 
+    const std::string& model_hash) {
+    
+    namespace fs = std::filesystem;
+    
+    fs::path base(stripOnnxExtension(model_path));
+    fs::path dir = base.has_parent_path() ? base.parent_path() : fs::path(".");
+    std::string prefix = base.filename().string() + ".";
+    std::string current_hash = model_hash.substr(0, 16);
+    
+    std::error_code ec;
+    fs::directory_iterator it(dir, ec);
+    for (; !ec && it != fs::directory_iterator(); it.increment(ec)) {
+        const auto& entry = *it;
+        std::string name = entry.path().filename().string();
+        if (name.rfind(prefix, 0) != 0) {
+            continue;
+        }
+        
+        bool is_cache = name.size() > 8 && 
+            (name.compare(name.size() - 8, 8, ".opt.ort") == 0 || 
+             (name.size() > 9 && name.compare(name.size() - 9, 9, ".opt.onnx") == 0));
+        
+        // 前缀后必须紧跟16位十六进制哈希，避免误删同名前缀的其他模型缓存
+        std::string rest = name.substr(prefix.size());
+        bool has_hash = rest.size() > 16 && rest[16] == '.' &&
+            std::all_of(rest.begin(), rest.begin() + 16, [](char c) { return std::isxdigit(static_cast<unsigned char>(c)); });
+        
+        // 仅删除旧模型内容的缓存，保留当前模型在其他优化级别/执行提供者下的缓存
+        if (is_cache && has_hash && rest.compare(0, 16, current_hash) != 0) {
+            std::error_code remove_ec;
+            fs::remove(entry.path(), remove_ec);
+            if (!remove_ec) {
+                LOG_INFO("Removed stale optimized model: " + entry.path().string());
+            }
+        }
+    }
+}
+
+// 配置基础会话选项 (不含执行提供者)
+void OnnxInferenceEngine::configureBaseSessionOptions() {
+    session_options_ = Ort::SessionOptions();
+    session_options_.SetIntraOpNumThreads(config_.worker_threads > 0 ? config_.worker_threads : 2);
+    session_options_.SetGraphOptimizationLevel(graph_optimization_level_);
+    session_options_.SetExecutionMode(ExecutionMode::ORT_SEQUENTIAL);
+    
+    // 如果启用了INT8量化，进行相关配置
+    if (use_int8_quantization_) {
+        auto quant_result = configureQuantization();
+        if (quant_result.hasError()) {
+            LOG_WARN("Failed to configure INT8 quantization: " + quant_result.error().message);
+            use_int8_quantization_ = false;
+        }
+    }
+}
+
+// 配置执行提供者
+Result<void> OnnxInferenceEngine::configureExecutionProviders() {
+    std::vector<std::string> available;
+    try {
+        available = Ort::GetAvailableProviders();
+    } catch (const Ort::Exception& e) {
+        return Result<void>::error(
+            ErrorCode::INFERENCE_ERROR,
+            "Failed to query execution providers: " + std::string(e.what())
+        );
+    }
+    
+    active_providers_.clear();
+    
+    for (const auto& provider : config_.optimization.execution_providers) {
+        // CPU是ORT隐式的最终回退，会承接所有剩余节点，其后的提供者不会生效
+        if (provider == "CPUExecutionProvider") {
+            active_providers_.push_back(provider);
+            LOG_INFO("Execution provider added: " + provider);
+            break;
+        }
+        
+        if (std::find(available.begin(), available.end(), provider) == available.end()) {
+            LOG_INFO("Execution provider not available, skipping: " + provider);
+            continue;
+        }
+        
+        // 单个提供者失败 (如缺少libnvinfer) 时继续尝试下一个
+        try {
+            if (provider == "TensorrtExecutionProvider") {
+                appendTensorRTProvider();
+                
+                // TensorRT编译后的节点无法序列化，改用其自身的引擎缓存
+                use_compiled_provider_ = true;
+            } else if (provider == "CUDAExecutionProvider") {
+                OrtCUDAProviderOptions cuda_options;
+                cuda_options.device_id = 0;
+                cuda_options.arena_extend_strategy = 0;
+                cuda_options.cudnn_conv_algo_search = OrtCudnnConvAlgoSearch::EXHAUSTIVE;
+                cuda_options.do_copy_in_default_stream = 1;
+                session_options_.AppendExecutionProvider_CUDA(cuda_options);
+            } else {
+                LOG_WARN("Unsupported execution provider, skipping: " + provider);
+                continue;
+            }
+        } catch (const Ort::Exception& e) {
+            LOG_WARN("Failed to add execution provider " + provider + ": " + std::string(e.what()));
+            continue;
+        }
+        
+        active_providers_.push_back(provider);
+        LOG_INFO("Execution provider added: " + provider);
+    }
+    
+    return Result<void>::ok();
+}
+
+// 添加TensorRT执行提供者
+void OnnxInferenceEngine::appendTensorRTProvider() {
+    const OrtApi& api = Ort::GetApi();
+    OrtTensorRTProviderOptionsV2* raw_options = nullptr;
+    Ort::ThrowOnError(api.CreateTensorRTProviderOptions(&raw_options));
+    std::unique_ptr<OrtTensorRTProviderOptionsV2, void(*)(OrtTensorRTProviderOptionsV2*)> trt_options(
+        raw_options, api.ReleaseTensorRTProviderOptions);
+    
+    // 引擎缓存避免每次启动重新构建TensorRT引擎
+    std::vector<const char*> keys = {"trt_engine_cache_enable", "trt_engine_cache_path"};
+    std::vector<const char*> values = {"1", config_.optimization.trt_engine_cache_path.c_str()};
+    
+    // INT8模式需要离线生成的校准表 (位于引擎缓存目录)，缺失时TensorRT会在构建会话时报错
+    if (use_int8_quantization_) {
+        std::filesystem::path table_path = std::filesystem::path(config_.optimization.trt_engine_cache_path) / 
+                                           config_.optimization.trt_int8_calibration_table;
+        if (fileExists(table_path.string())) {
+            keys.push_back("trt_int8_enable");
+            values.push_back("1");
+            keys.push_back("trt_int8_calibration_table_name");
+            values.push_back(config_.optimization.trt_int8_calibration_table.c_str());
+        } else {
+            LOG_WARN("TensorRT INT8 calibration table not found, INT8 disabled for TensorRT: " + 
+                     table_path.string());
+        }
+    }
+    
+    Ort::ThrowOnError(api.UpdateTensorRTProviderOptions(
+        trt_options.get(), keys.data(), values.data(), keys.size()));
+    session_options_.AppendExecutionProvider_TensorRT_V2(*trt_options);
+}
+
 // 配置INT8量化
 Result<void> OnnxInferenceEngine::configureQuantization() {
     try {
         // 设置图优化级别
-        session_options_.SetGraphOptimizationLevel(GraphOptimizationLevel::ORT_ENABLE_EXTENDED);
+        graph_optimization_level_ = GraphOptimizationLevel::ORT_ENABLE_EXTENDED;
+        session_options_.SetGraphOptimizationLevel(graph_optimization_level_);
         
         // 配置INT8量化
         session_options_.AddConfigEntry("session.use_int8_inference", "1");
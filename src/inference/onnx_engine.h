@@ -160,15 +160,15 @@ private:
     // 执行单个推理请求
     Result<GameState> runInference(const InferenceRequest& request);
     
-    // 图像预处理
-    Result<std::vector<float>> preProcess(
+    // 图像预处理 (结果直接写入缓冲区)
+    Result<void> preProcess(
         const std::vector<uint8_t>& image_data, 
         int width, 
         int height,
         ReusableBuffer<float>& buffer);
     
-    // 零拷贝预处理
-    Result<std::vector<float>> preProcessZeroCopy(
+    // 零拷贝预处理 (结果直接写入缓冲区)
+    Result<void> preProcessZeroCopy(
         const uint8_t* image_data,
         size_t data_size, 
         int width, 
@@ -198,12 +198,30 @@ private:
     // 模型版本检查和加载
     Result<void> loadModel(const std::string& model_path, bool force_reload = false);
     
+    // 创建推理会话 (优先使用离线优化后的模型)
+    std::unique_ptr<Ort::Session> createSession(const std::string& model_path, const std::string& model_hash);
+    
+    // 获取离线优化模型的缓存路径
+    std::string getOptimizedModelPath(const std::string& model_path, const std::string& model_hash);
+    
+    // 删除同一模型的过期优化缓存 (仅删除哈希不同的缓存)
+    void removeStaleOptimizedModels(const std::string& model_path, const std::string& model_hash);
+    
     // 计算模型哈希值
     std::string calculateModelHash(const std::string& model_path);
     
     // 配置INT8量化
     Result<void> configureQuantization();
     
+    // 配置基础会话选项 (线程数、图优化级别、量化)
+    void configureBaseSessionOptions();
+    
+    // 按优先级配置执行提供者
+    Result<void> configureExecutionProviders();
+    
+    // 添加TensorRT执行提供者 (失败时抛出Ort::Exception)
+    void appendTensorRTProvider();
+    
     // 检查文件是否存在
     bool fileExists(const std::string& path);
     
@@ -237,6 +255,9 @@ private:
     // 模型信息
     ModelInfo model_info_;
     
+    // 已启用的执行提供者
+    std::vector<std::string> active_providers_;
+    
     // 线程控制
     std::atomic<bool> running_;
     std::thread inference_thread_;
@@ -274,6 +295,8 @@ private:
     
     // 功能开关
     bool simulation_mode_;            // 模拟模式
+    bool use_compiled_provider_;      // 使用编译型执行提供者 (TensorRT)
+    GraphOptimizationLevel graph_optimization_level_; // 会话图优化级别
     bool use_int8_quantization_;      // 使用INT8量化
     bool use_zero_copy_;              // 使用零拷贝
     bool use_dynamic_batching_;       // 使用动态批处理
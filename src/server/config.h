@@ -301,6 +301,55 @@ struct AnalyticsConfig {
     }
 };
 
+// 推理优化配置
+struct OptimizationConfig {
+    bool use_int8_quantization;       // 是否使用INT8量化
+    bool use_zero_copy;               // 是否使用零拷贝
+    bool use_dynamic_batching;        // 是否使用动态批处理
+    bool use_model_monitor;           // 是否启用模型监控
+    bool use_priority_scheduling;     // 是否启用优先级调度
+    std::vector<std::string> execution_providers; // 执行提供者优先级列表
+    std::string trt_engine_cache_path;            // TensorRT引擎缓存目录
+    std::string trt_int8_calibration_table;       // TensorRT INT8校准表文件名
+    
+    // 默认构造函数
+    OptimizationConfig()
+        : use_int8_quantization(false),
+          use_zero_copy(true),
+          use_dynamic_batching(false),
+          use_model_monitor(true),
+          use_priority_scheduling(true),
+          execution_providers({"TensorrtExecutionProvider", "CUDAExecutionProvider", "CPUExecutionProvider"}),
+          trt_engine_cache_path("models/trt_cache"),
+          trt_int8_calibration_table("calibration.flatbuffers") {
+    }
+    
+    // JSON序列化/反序列化
+    void to_json(json& j) const {
+        j = json{
+            {"use_int8_quantization", use_int8_quantization},
+            {"use_zero_copy", use_zero_copy},
+            {"use_dynamic_batching", use_dynamic_batching},
+            {"use_model_monitor", use_model_monitor},
+            {"use_priority_scheduling", use_priority_scheduling},
+            {"execution_providers", execution_providers},
+            {"trt_engine_cache_path", trt_engine_cache_path},
+            {"trt_int8_calibration_table", trt_int8_calibration_table}
+        };
+    }
+    
+    void from_json(const json& j) {
+        if (j.contains("use_int8_quantization")) j.at("use_int8_quantization").get_to(use_int8_quantization);
+        if (j.contains("use_zero_copy")) j.at("use_zero_copy").get_to(use_zero_copy);
+        if (j.contains("use_dynamic_batching")) j.at("use_dynamic_batching").get_to(use_dynamic_batching);
+        if (j.contains("use_model_monitor")) j.at("use_model_monitor").get_to(use_model_monitor);
+        if (j.contains("use_priority_scheduling")) j.at("use_priority_scheduling").get_to(use_priority_scheduling);
+        if (j.contains("execution_providers")) j.at("execution_providers").get_to(execution_providers);
+        if (j.contains("trt_engine_cache_path")) j.at("trt_engine_cache_path").get_to(trt_engine_cache_path);
+        if (j.contains("trt_int8_calibration_table")) j.at("trt_int8_calibration_table").get_to(trt_int8_calibration_table);
+    }
+};
+
 // 服务器配置
 struct ServerConfig {
     std::string model_path;           // 模型路径
@@ -321,6 +370,7 @@ struct ServerConfig {
     DetectionConfig detection;        // 检测配置
     GameAdaptersConfig game_adapters; // 游戏适配器配置
     AnalyticsConfig analytics;        // 分析配置
+    OptimizationConfig optimization;  // 推理优化配置
     
     // 默认构造函数
     ServerConfig()
@@ -382,6 +432,10 @@ struct ServerConfig {
         json analytics_json;
         analytics.to_json(analytics_json);
         j["analytics"] = analytics_json;
+        
+        json optimization_json;
+        optimization.to_json(optimization_json);
+        j["optimization"] = optimization_json;
     }
     
     void from_json(const json& j) {
@@ -405,6 +459,7 @@ struct ServerConfig {
         if (j.contains("detection")) detection.from_json(j.at("detection"));
         if (j.contains("game_adapters")) game_adapters.from_json(j.at("game_adapters"));
         if (j.contains("analytics")) analytics.from_json(j.at("analytics"));
+        if (j.contains("optimization")) optimization.from_json(j.at("optimization"));
     }
 };
 
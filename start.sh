@@ -105,7 +105,7 @@ fi
 
 # 5. 安装Python依赖
 log_info "安装Python依赖..."
-pip3 install -q torch torchvision onnx onnxruntime
+pip3 install -q torch torchvision onnx onnxruntime onnxslim
 pip3 install -q -e third_party/ultralytics
 
 # 6. 下载YOLOv8模型并导出为ONNX格式
@@ -121,8 +121,10 @@ try:
     # 下载YOLOv8n模型
     model = YOLO("yolov8n.pt")
     
-    # 导出为ONNX格式
-    success = model.export(format="onnx", imgsz=416)
+    # 导出为ONNX格式 (动态batch/宽高，同一模型可服务不同输入尺寸)
+    # 注意: 量化校准应使用最常用的输入尺寸，其他尺寸下精度会略有下降
+    # simplify: 导出后执行常量折叠和冗余节点消除，减少推理时的图优化开销
+    success = model.export(format="onnx", imgsz=416, dynamic=True, simplify=True)
     
     # 创建符号链接
     if os.path.exists("yolov8n.onnx"):